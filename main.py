@@ -1,7 +1,13 @@
 import requests
+from collections import defaultdict
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-import json
+import orjson
 import os
+import threading
+from urllib.parse import urlencode
 from dotenv import load_dotenv
 
 # --- Load .env ---
@@ -15,26 +21,74 @@ if not CLIENT_ID or not CLIENT_SECRET:
 
 # --- CONFIG ---
 TOKEN_FILE = "breezeway_token.json"
+PROPERTY_MAP_FILE = "property_map.json"
 BASE_URL = "https://api.breezeway.io"
 
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN") 
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID") 
+# Telegram rejects messages over 4096 characters; leave some headroom
+TELEGRAM_MESSAGE_LIMIT = 4000
 
 BASE_PROPERTY_URL = f"{BASE_URL}/public/inventory/v1/property"
 BASE_RESERVATION_URL = f"{BASE_URL}/public/inventory/v1/reservation"
 BASE_TASK_URL = f"{BASE_URL}/public/inventory/v1/task"
 
+# Upper bound on in-flight Breezeway requests, to stay within API rate limits
+MAX_CONCURRENT_REQUESTS = 16
+REQUEST_SLOTS = threading.BoundedSemaphore(MAX_CONCURRENT_REQUESTS)
+# Serializes token refreshes when several requests hit a 401 at once
+TOKEN_LOCK = threading.Lock()
+# Authorization headers whose refresh already failed, so they aren't retried
+FAILED_TOKEN_REFRESHES = set()
+
+# (connect, read) seconds, so a hung endpoint can't stall the run
+REQUEST_TIMEOUT = (5, 30)
+
+# Shared session so every call reuses pooled keep-alive connections. Each
+# in-flight request holds its own HTTP/1.1 connection, so the per-host pool
+# covers the concurrency cap plus the token refresh POST, which runs outside
+# REQUEST_SLOTS, and a burst never opens throwaway sockets.
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=2,
+    pool_maxsize=MAX_CONCURRENT_REQUESTS + 1,
+    max_retries=Retry(
+        total=3,
+        connect=3,
+        read=3,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET", "POST"]),
+        raise_on_status=False,
+    ),
+))
+# sendMessage is not idempotent: a read timeout may mean Telegram already
+# delivered the part, so only retry failed connects and explicit rate limits.
+SESSION.mount("https://api.telegram.org", HTTPAdapter(
+    pool_connections=1,
+    pool_maxsize=1,
+    max_retries=Retry(
+        total=3,
+        connect=3,
+        read=0,
+        backoff_factor=0.5,
+        status_forcelist=(429,),
+        allowed_methods=frozenset(["POST"]),
+        raise_on_status=False,
+    ),
+))
+
 # --- Token caching ---
 def save_token(token_data):
     expires_at = datetime.now() + timedelta(hours=23)
     data_to_save = {"access_token": token_data, "expires_at": expires_at.isoformat()}
-    with open(TOKEN_FILE, "w") as f:
-        json.dump(data_to_save, f)
+    with open(TOKEN_FILE, "wb") as f:
+        f.write(orjson.dumps(data_to_save))
 
 def load_token():
     try:
-        with open(TOKEN_FILE, "r") as f:
-            data = json.load(f)
+        with open(TOKEN_FILE, "rb") as f:
+            data = orjson.loads(f.read())
         expires_at = datetime.fromisoformat(data["expires_at"])
         if expires_at > datetime.now():
             print("✅ Found valid token in cache.")
@@ -42,128 +96,278 @@ def load_token():
         else:
             print("Token in cache has expired.")
             return None
-    except (FileNotFoundError, json.JSONDecodeError):
+    except (FileNotFoundError, orjson.JSONDecodeError):
         return None
 
-def get_breezeway_token():
-    cached = load_token()
+def get_breezeway_token(force=False):
+    cached = None if force else load_token()
     if cached:
         return cached
     print("🔑 Requesting new access token...")
     auth_url = f"{BASE_URL}/public/auth/v1/"
     payload = {"client_id": CLIENT_ID, "client_secret": CLIENT_SECRET}
-    headers = {"Content-Type": "application/json", "Accept": "application/json"}
+    # Drop the session's Authorization header: on a refresh it holds the rejected token
+    headers = {"Content-Type": "application/json", "Accept": "application/json", "Authorization": None}
     try:
-        response = requests.post(auth_url, headers=headers, json=payload)
+        response = SESSION.post(auth_url, headers=headers, json=payload, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
-        token = response.json().get("access_token")
+        token = parse_json(response).get("access_token")
         if token:
             save_token(token)
             print("✅ Successfully generated new access token!")
             return token
-    except requests.exceptions.RequestException as err:
+    except (requests.exceptions.RequestException, orjson.JSONDecodeError) as err:
         print(f"❌ Error during authentication: {err}")
         return None
 
 # --- Telegram sender ---
+def split_message(message: str, limit: int = TELEGRAM_MESSAGE_LIMIT):
+    """Split message into parts of at most limit characters, breaking at newlines."""
+    parts = []
+    current = ""
+    for line in message.split("\n"):
+        while len(line) > limit:
+            if current:
+                parts.append(current)
+                current = ""
+            parts.append(line[:limit])
+            line = line[limit:]
+        candidate = f"{current}\n{line}" if current else line
+        if len(candidate) > limit:
+            parts.append(current)
+            current = line
+        else:
+            current = candidate
+    if current:
+        parts.append(current)
+    return parts
+
 def send_to_telegram(message: str):
     url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-    payload = {"chat_id": TELEGRAM_CHAT_ID, "text": message}
-    response = requests.post(url, data=payload)
+    # Parts go out one at a time so they arrive in order
+    for part in split_message(message):
+        payload = {"chat_id": TELEGRAM_CHAT_ID, "text": part}
+        try:
+            # Drop the session's Breezeway Authorization header for this host
+            response = SESSION.post(url, data=payload, headers={"Authorization": None}, timeout=REQUEST_TIMEOUT)
+        except requests.exceptions.RequestException as err:
+            print(f"❌ Failed to send to Telegram: {err}")
+            continue
+        if response.status_code != 200:
+            print(f"❌ Failed to send to Telegram: {response.text}")
+
+# --- HTTP helpers ---
+def parse_json(response):
+    return orjson.loads(response.content)
+
+def api_get(url):
+    with REQUEST_SLOTS:
+        response = SESSION.get(url, timeout=REQUEST_TIMEOUT)
+    if response.status_code == 401:
+        # Token was revoked or rotated early: re-authenticate once and retry
+        if refresh_session_token(response.request.headers.get("Authorization")):
+            with REQUEST_SLOTS:
+                response = SESSION.get(url, timeout=REQUEST_TIMEOUT)
+    return response
+
+def refresh_session_token(stale_authorization):
+    """Return True if the session now holds a token other than stale_authorization."""
+    with TOKEN_LOCK:
+        if SESSION.headers.get("Authorization") != stale_authorization:
+            # Another request already refreshed it
+            return True
+        if stale_authorization in FAILED_TOKEN_REFRESHES:
+            return False
+        token = get_breezeway_token(force=True)
+        if not token:
+            FAILED_TOKEN_REFRESHES.add(stale_authorization)
+            return False
+        SESSION.headers["Authorization"] = f"JWT {token}"
+        return True
+
+def parallel_map(func, items):
+    """Run func over items on a thread pool, returning results in input order."""
+    items = list(items)
+    if not items:
+        return []
+    with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_REQUESTS, len(items))) as executor:
+        return list(executor.map(func, items))
+
+def is_last_page(data, page, limit):
+    total_pages = data.get("total_pages")
+    if total_pages:
+        return data.get("page", page) >= total_pages
+    # No page count in the response: a short page is the last one
+    return len(data.get("results", [])) < limit
+
+def fetch_page(base, page):
+    """Return (data, failure): data is None and failure the status code or error if the page failed."""
+    try:
+        response = api_get(f"{base}&page={page}")
+    except requests.exceptions.RequestException as err:
+        print(f"❌ Error fetching {base}&page={page}: {err}")
+        return None, err
     if response.status_code != 200:
-        print(f"❌ Failed to send to Telegram: {response.text}")
+        return None, response.status_code
+    return parse_json(response), None
+
+def fetch_pages(base, limit):
+    """Collect results from every page of base.
+
+    Returns (results, failure). failure is None when every page was fetched;
+    otherwise results stop at the last good page (None if the first page
+    failed) and failure is that page's status code or error.
+    """
+    first, failure = fetch_page(base, 1)
+    if first is None:
+        return None, failure
+    pages = [(first, None)]
+    total_pages = first.get("total_pages")
+    if total_pages and not is_last_page(first, 1, limit):
+        # Page count is known up front, so request the rest concurrently
+        pages.extend(parallel_map(lambda page: fetch_page(base, page), range(2, total_pages + 1)))
+    else:
+        page = 1
+        while not is_last_page(pages[-1][0], page, limit):
+            page += 1
+            data, failure = fetch_page(base, page)
+            pages.append((data, failure))
+            if data is None:
+                break
+
+    results = []
+    for data, failure in pages:
+        # Stop at the first failed page, as a sequential walk would
+        if data is None:
+            return results, failure
+        results.extend(data.get("results", []))
+    return results, None
 
 # --- Fetch properties ---
-def fetch_property_map(headers):
+def fetch_property_map():
+    """Return (property_map, complete); complete is False if any page failed."""
     property_map = {}
-    page = 1
     limit = 100
-    while True:
-        url = f"{BASE_PROPERTY_URL}?limit={limit}&page={page}"
-        response = requests.get(url, headers=headers)
-        if response.status_code != 200:
-            break
-        for prop in response.json().get("results", []):
-            if prop.get("status") == "active":
-                property_map[prop.get("id")] = {"name": prop.get("name") or "Unnamed Property"}
-        if len(response.json().get("results", [])) < limit:
-            break
-        page += 1
+    base = f"{BASE_PROPERTY_URL}?limit={limit}"
+    results, failure = fetch_pages(base, limit)
+    for prop in results or []:
+        if prop.get("status") == "active":
+            property_map[prop.get("id")] = {"name": prop.get("name") or "Unnamed Property"}
+    return property_map, failure is None
+
+# --- Property map caching ---
+def save_property_map(property_map):
+    expires_at = datetime.now() + timedelta(hours=6)
+    data_to_save = {"property_map": property_map, "expires_at": expires_at.isoformat()}
+    with open(PROPERTY_MAP_FILE, "wb") as f:
+        f.write(orjson.dumps(data_to_save, option=orjson.OPT_NON_STR_KEYS))
+
+def load_property_map():
+    try:
+        with open(PROPERTY_MAP_FILE, "rb") as f:
+            data = orjson.loads(f.read())
+        expires_at = datetime.fromisoformat(data["expires_at"])
+        if expires_at > datetime.now():
+            # JSON object keys are strings; property ids are ints everywhere else
+            return {int(prop_id): info for prop_id, info in data["property_map"].items()}
+        else:
+            print("Property map in cache has expired.")
+            return None
+    except (FileNotFoundError, orjson.JSONDecodeError, KeyError, ValueError):
+        return None
+
+def get_property_map():
+    cached = load_property_map()
+    if cached:
+        return cached
+    property_map, complete = fetch_property_map()
+    # A partial catalogue is still usable for this run, but must not be cached
+    if property_map and complete:
+        save_property_map(property_map)
     return property_map
 
 # --- Fetch reservations ---
-def fetch_reservations(date, headers, checkin=True):
-    reservations = []
-    page = 1
+def fetch_reservations(date, checkin=True):
     limit = 100
-    while True:
-        url = f"{BASE_RESERVATION_URL}?limit={limit}&page={page}"
-        if checkin:
-            url += f"&checkin_date_ge={date}&checkin_date_le={date}"
-        else:
-            url += f"&checkout_date_ge={date}&checkout_date_le={date}"
-        response = requests.get(url, headers=headers)
-        if response.status_code != 200:
-            break
-        reservations.extend(response.json().get("results", []))
-        if len(response.json().get("results", [])) < limit:
-            break
-        page += 1
-    return reservations
+    field = "checkin_date" if checkin else "checkout_date"
+    query = urlencode({"limit": limit, f"{field}_ge": date, f"{field}_le": date})
+    base = f"{BASE_RESERVATION_URL}?{query}"
+    results, _ = fetch_pages(base, limit)
+    return results or []
 
 # --- Fetch tasks ---
-def fetch_tasks(home_id, date, headers):
-    all_tasks = []
-    page = 1
+def fetch_tasks(home_id, date):
     limit = 100
-    while True:
-        url = f"{BASE_TASK_URL}?home_id={home_id}&scheduled_date={date},{date}&limit={limit}&page={page}"
-        response = requests.get(url, headers=headers)
-        if response.status_code != 200:
-            break
-        results = response.json().get("results", [])
-        housekeeping_tasks = [t for t in results if t.get("type_department") == "housekeeping"]
-        all_tasks.extend(housekeeping_tasks)
-        if len(results) < limit:
-            break
-        page += 1
-    return all_tasks
+    query = urlencode({
+        "home_id": home_id,
+        "type_department": "housekeeping",
+        "scheduled_date": f"{date},{date}",
+        "limit": limit,
+    }, safe=",")
+    base = f"{BASE_TASK_URL}?{query}"
+    results, _ = fetch_pages(base, limit)
+    return results or []
+
+# --- Fetch every property's tasks in one query ---
+def fetch_all_housekeeping_tasks(date):
+    """Return (tasks, failure) as fetch_pages does, without a home_id filter."""
+    limit = 100
+    query = urlencode({
+        "type_department": "housekeeping",
+        "scheduled_date": f"{date},{date}",
+        "limit": limit,
+    }, safe=",")
+    base = f"{BASE_TASK_URL}?{query}"
+    return fetch_pages(base, limit)
+
+def fetch_tasks_by_home(date, property_map):
+    all_tasks, failure = fetch_all_housekeeping_tasks(date)
+    if all_tasks is None:
+        if failure == 400:
+            # The endpoint wants a home_id: query each property instead
+            tasks = parallel_map(lambda prop_id: fetch_tasks(prop_id, date), property_map)
+            return dict(zip(property_map, tasks))
+        # Anything else is an outage; don't multiply it into one query per property
+        print(f"❌ Failed to fetch housekeeping tasks for {date}: {failure}")
+        return {}
+    tasks_by_home = defaultdict(list)
+    for task in all_tasks:
+        tasks_by_home[task.get("home_id")].append(task)
+    return tasks_by_home
+
+# --- Fetch a single task with finished_at and assignments ---
+def fetch_task_detail(task_id):
+    try:
+        resp = api_get(f"{BASE_TASK_URL}/{task_id}")
+    except requests.exceptions.RequestException as err:
+        print(f"❌ Error fetching task {task_id}: {err}")
+        return None
+    if resp.status_code != 200:
+        return None
+    return parse_json(resp)
 
 # --- Determine check-in cleaning status ---
-def get_checkin_cleaning_status(prop_id, headers, last_checkout_date):
+def get_checkin_cleaning_status(prop_id, last_checkout_date):
     today = datetime.now().strftime("%Y-%m-%d")
 
     # Step 1: Fetch all housekeeping tasks scheduled after last checkout
-    url = f"{BASE_TASK_URL}?home_id={prop_id}&type_department=housekeeping&scheduled_date={last_checkout_date},{today}&limit=100&page=1"
-    all_tasks = []
-    while url:
-        response = requests.get(url, headers=headers)
-        if response.status_code != 200:
-            break
-        data = response.json()
-        tasks = data.get("results", [])
-        all_tasks.extend(tasks)
-
-        # Pagination
-        total_pages = data.get("total_pages", 1)
-        current_page = data.get("page", 1)
-        if current_page >= total_pages:
-            break
-        url = f"{BASE_TASK_URL}?home_id={prop_id}&type_department=housekeeping&scheduled_date={last_checkout_date},{today}&limit=100&page={current_page+1}"
+    limit = 100
+    query = urlencode({
+        "home_id": prop_id,
+        "type_department": "housekeeping",
+        "scheduled_date": f"{last_checkout_date},{today}",
+        "limit": limit,
+    }, safe=",")
+    base = f"{BASE_TASK_URL}?{query}"
+    all_tasks, _ = fetch_pages(base, limit)
+    all_tasks = all_tasks or []
 
     if not all_tasks:
         return "Dirty"
 
     # Step 2: Call task detail endpoint to get finished_at and assignments
-    detailed_tasks = []
-    for t in all_tasks:
-        task_id = t.get("id")
-        if not task_id:
-            continue
-        resp = requests.get(f"{BASE_TASK_URL}/{task_id}", headers=headers)
-        if resp.status_code != 200:
-            continue
-        detailed_tasks.append(resp.json())
+    task_ids = [t["id"] for t in all_tasks if t.get("id")]
+    detailed_tasks = [t for t in parallel_map(fetch_task_detail, task_ids) if t]
 
     if not detailed_tasks:
         return "Dirty"
@@ -173,8 +377,7 @@ def get_checkin_cleaning_status(prop_id, headers, last_checkout_date):
     if not completed_tasks:
         return "Dirty"
 
-    completed_tasks.sort(key=lambda t: t.get("finished_at"), reverse=True)
-    last_task = completed_tasks[0]
+    last_task = max(completed_tasks, key=lambda t: t.get("finished_at"))
 
     task_name = last_task.get("type") or last_task.get("name") or "Unnamed Task"
     cleaner_name = "Unknown cleaner"
@@ -185,14 +388,15 @@ def get_checkin_cleaning_status(prop_id, headers, last_checkout_date):
     return f"Ready - {task_name} - Cleaned by {cleaner_name} - {finished_date}"
 
 # --- Fetch yesterday's completed cleanings ---
-def fetch_yesterday_cleanings(headers):
+def fetch_yesterday_cleanings(property_map):
     yesterday = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
-    property_map = fetch_property_map(headers)
-    output = [f"\nYesterday’s Cleaning Summary ({yesterday})"]
+    header = f"\nYesterday’s Cleaning Summary ({yesterday})"
+    rows = []
+    tasks_by_home = fetch_tasks_by_home(yesterday, property_map)
 
     for prop_id, prop_info in property_map.items():
         prop_name = prop_info["name"]
-        tasks = fetch_tasks(prop_id, yesterday, headers)
+        tasks = tasks_by_home.get(prop_id, [])
         if not tasks:
             continue
         for task in tasks:
@@ -202,115 +406,149 @@ def fetch_yesterday_cleanings(headers):
             assignments = task.get("assignments", [])
             if not assignments:
                 continue
+            # The same cleaner can be assigned to a task more than once; list them once
+            seen = set()
             for assignment in assignments:
                 cleaner_name = assignment.get("name") or "Unknown"
                 status = "Completed" if assignment.get("type_task_user_status") == "completed" or task.get("finished_at") else "Not completed"
-                output.append(f"- {prop_name} - {task_name} - {cleaner_name} - {status}")
-    return "\n".join(output)
+                if (cleaner_name, status) in seen:
+                    continue
+                seen.add((cleaner_name, status))
+                rows.append((prop_name, task_name, cleaner_name, status))
+    return "\n".join([header] + ["- {0} - {1} - {2} - {3}".format(*row) for row in rows])
 
 
 
 # --- MAIN ---
-if __name__ == "__main__":
+def main():
     token = get_breezeway_token()
     if not token:
         print("❌ Cannot proceed without a valid Breezeway token.")
         exit(1)
 
-    HEADERS = {"accept": "application/json", "Authorization": f"JWT {token}"}
+    SESSION.headers.update({"accept": "application/json", "Authorization": f"JWT {token}"})
     today = datetime.now().strftime("%Y-%m-%d")
     output = [f"Today’s Cleaning Summary ({today})\n"]
-    property_map = fetch_property_map(HEADERS)
-
-    # --- Check-ins ---
-    output.append("Check-ins today:")
-    checkins = fetch_reservations(today, HEADERS, checkin=True)
-    if checkins:
-        printed = set()
-        for res in checkins:
-            prop_id = res.get("property_id")
-            prop_info = property_map.get(prop_id)
-            if not prop_info:
-                continue
-            prop_name = prop_info["name"]
-            if prop_name in printed:
-                continue
 
-            # Find last checkout date
-            all_checkouts = [c for c in fetch_reservations(today, HEADERS, checkin=False)
-                             if c.get("property_id") == prop_id]
-            if all_checkouts:
-                last_checkout_date = max(c.get("checkout_date") for c in all_checkouts)
-            else:
-                last_checkout_date = (datetime.now() - timedelta(days=90)).strftime("%Y-%m-%d")
-
-            prop_status = get_checkin_cleaning_status(prop_id, HEADERS, last_checkout_date)
-            output.append(f"- {prop_name} - {prop_status}")
-            printed.add(prop_name)
-    else:
-        output.append("No check-ins today.")
+    # Independent top-level lookups run side by side
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        property_future = executor.submit(get_property_map)
+        checkins_future = executor.submit(fetch_reservations, today, True)
+        checkouts_future = executor.submit(fetch_reservations, today, False)
+        property_map = property_future.result()
+        checkins = checkins_future.result()
+        checkouts = checkouts_future.result()
+
+    # Yesterday's summary only needs the property map, so build it alongside today's
+    with ThreadPoolExecutor(max_workers=1) as yesterday_executor:
+        yesterday_future = yesterday_executor.submit(fetch_yesterday_cleanings, property_map)
+
+        checkouts_by_prop = defaultdict(list)
+        for c in checkouts:
+            checkouts_by_prop[c.get("property_id")].append(c)
+
+        # --- Check-ins ---
+        output.append("Check-ins today:")
+        if checkins:
+            printed = set()
+            pending_checkins = []
+            for res in checkins:
+                prop_id = res.get("property_id")
+                prop_info = property_map.get(prop_id)
+                if not prop_info:
+                    continue
+                if prop_id in printed:
+                    continue
+                prop_name = prop_info["name"]
+
+                # Find last checkout date
+                all_checkouts = checkouts_by_prop.get(prop_id, [])
+                if all_checkouts:
+                    last_checkout_date = max(c.get("checkout_date") for c in all_checkouts)
+                else:
+                    last_checkout_date = (datetime.now() - timedelta(days=90)).strftime("%Y-%m-%d")
 
-    # --- Check-outs & Pending cleanings ---
-    output.append("\nCheck-outs today:")
-    checkouts = fetch_reservations(today, HEADERS, checkin=False)
-    cleaning_map = {}
+                pending_checkins.append((prop_id, prop_name, last_checkout_date))
+                printed.add(prop_id)
 
-    for prop_id, prop_info in property_map.items():
-        prop_name = prop_info["name"]
-        tasks = fetch_tasks(prop_id, today, HEADERS)
-        if tasks:
-            cleaning_map[prop_name] = []
-            for task in tasks:
-                task_name = task.get("type") or task.get("name") or "Unnamed Task"
-                assignments = task.get("assignments", [])
-                if not assignments:
-                    cleaning_map[prop_name].append(f"{prop_name} - {task_name} - Not assigned")
-                else:
-                    for assignment in assignments:
-                        cleaner_name = assignment.get("name") or "Not assigned"
-                        assignment_status = assignment.get("type_task_user_status") or "Unknown"
-                        cleaning_map[prop_name].append(
-                            f"{prop_name} - {task_name} - {cleaner_name} - {assignment_status}"
-                        )
-
-    checkout_props = set()
-    if checkouts:
-        for res in checkouts:
-            prop_id = res.get("property_id")
-            prop_info = property_map.get(prop_id)
-            if not prop_info:
-                continue
+            statuses = parallel_map(
+                lambda item: get_checkin_cleaning_status(item[0], item[2]),
+                pending_checkins,
+            )
+            for (_, prop_name, _), prop_status in zip(pending_checkins, statuses):
+                output.append(f"- {prop_name} - {prop_status}")
+        else:
+            output.append("No check-ins today.")
+
+        # --- Check-outs & Pending cleanings ---
+        output.append("\nCheck-outs today:")
+        cleaning_map = {}
+
+        tasks_by_home = fetch_tasks_by_home(today, property_map)
+        for prop_id, prop_info in property_map.items():
             prop_name = prop_info["name"]
-            checkout_props.add(prop_name)
-            if prop_name in cleaning_map:
-                for c in cleaning_map[prop_name]:
-                    output.append(f"- {c}")
-            else:
-                output.append(f"- {prop_name}")
-    else:
-        output.append("No check-outs today.")
+            tasks = tasks_by_home.get(prop_id, [])
+            if tasks:
+                cleaning_map[prop_id] = []
+                for task in tasks:
+                    task_name = task.get("type") or task.get("name") or "Unnamed Task"
+                    assignments = task.get("assignments", [])
+                    if not assignments:
+                        cleaning_map[prop_id].append(f"{prop_name} - {task_name} - Not assigned")
+                    else:
+                        # The same cleaner can be assigned to a task more than once; list them once
+                        seen = set()
+                        for assignment in assignments:
+                            cleaner_name = assignment.get("name") or "Not assigned"
+                            assignment_status = assignment.get("type_task_user_status") or "Unknown"
+                            if (cleaner_name, assignment_status) in seen:
+                                continue
+                            seen.add((cleaner_name, assignment_status))
+                            cleaning_map[prop_id].append(
+                                f"{prop_name} - {task_name} - {cleaner_name} - {assignment_status}"
+                            )
+
+        checkout_props = set()
+        if checkouts:
+            for res in checkouts:
+                prop_id = res.get("property_id")
+                prop_info = property_map.get(prop_id)
+                if not prop_info:
+                    continue
+                prop_name = prop_info["name"]
+                checkout_props.add(prop_id)
+                if prop_id in cleaning_map:
+                    for c in cleaning_map[prop_id]:
+                        output.append(f"- {c}")
+                else:
+                    output.append(f"- {prop_name}")
+        else:
+            output.append("No check-outs today.")
+
+        # --- Pending cleanings ---
+        output.append("\nPending cleanings:")
+        has_pending = False
+        for prop_id, cleanings in cleaning_map.items():
+            if prop_id not in checkout_props:
+                for c in cleanings:
+                    output.append(c)
+                    has_pending = True
+        if not has_pending:
+            output.append("No pending cleanings today.")
 
-    # --- Pending cleanings ---
-    output.append("\nPending cleanings:")
-    has_pending = False
-    for prop_name, cleanings in cleaning_map.items():
-        if prop_name not in checkout_props:
-            for c in cleanings:
-                output.append(c)
-                has_pending = True
-    if not has_pending:
-        output.append("No pending cleanings today.")
+        # --- Prepare Today's summary ---
+        final_message = "\n".join(output)
 
-    # --- Prepare Today's summary ---
-final_message = "\n".join(output)
+        # --- Prepare Yesterday's summary ---
+        yesterday_message = yesterday_future.result()
 
-# --- Prepare Yesterday's summary ---
-yesterday_message = fetch_yesterday_cleanings(HEADERS)
+    # --- Combine both messages ---
+    combined_message = f"{final_message}\n\n{yesterday_message}"
 
-# --- Combine both messages ---
-combined_message = f"{final_message}\n\n{yesterday_message}"
+    # --- Send single Telegram message ---
+    print(combined_message)
+    send_to_telegram(combined_message)
 
-# --- Send single Telegram message ---
-print(combined_message)
-send_to_telegram(combined_message)
 
+if __name__ == "__main__":
+    main()